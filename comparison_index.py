@@ -0,0 +1,85 @@
+"""
+Comparison Index
+Precomputes percentile ranks, group leaders and national and group quartiles
+for every metric, in a compact columnar form, so the Visualization 2 comparison
+panel can compare any set of areas (and groups of areas) with lookups instead
+of scans. Only what the panel displays is shipped.
+"""
+
+import numpy as np
+
+# Summary statistics stored for the nation and for every group, in this order
+STATS = ['p25', 'median', 'p75']
+
+
+def summarize(values, decimals):
+    """The STATS of `values` as a list, rounded for display."""
+    stats = [
+        np.percentile(values, 25),
+        np.median(values),
+        np.percentile(values, 75)
+    ]
+    return [round(float(stat), decimals) for stat in stats]
+
+
+def percentile_ranks(values):
+    """Percentile rank (0-100) of every value within `values`.
+
+    Uses the mid-rank definition, (count below + half the ties) / n, so the
+    same value always gets the same percentile.
+    """
+    ordered = np.sort(values)
+    below = np.searchsorted(ordered, values, side='left')
+    at_or_below = np.searchsorted(ordered, values, side='right')
+    return np.rint((below + at_or_below) / 2 / len(values) * 100).astype(int)
+
+
+def highest(values, positions):
+    """The position in `positions` with the highest value (the first one on ties)."""
+    return int(positions[np.argmax(values[positions])])
+
+
+def build_comparison_index(df, id_column, name_column, group_column, metrics):
+    """Build the index shipped to the browser.
+
+    `metrics` is a list of (column, label, decimals, suffix). Areas are kept in
+    DataFrame order and referred to by position everywhere else in the index.
+    Percentiles within a group only compare an area against the other areas of
+    the same group, so they work the same for states within regions as for
+    finer areas within states.
+    """
+    groups = sorted(df[group_column].unique())
+    group_of = df[group_column].map({group: g for g, group in enumerate(groups)}).to_numpy()
+    members = [np.flatnonzero(group_of == g) for g in range(len(groups))]
+
+    index = {
+        'ids': df[id_column].tolist(),
+        'names': df[name_column].tolist(),
+        'group': group_of.tolist(),
+        'groups': groups,
+        'members': [m.tolist() for m in members],
+        'stats': STATS,
+        'metricOrder': [column for column, _, _, _ in metrics],
+        'metrics': {}
+    }
+
+    for column, label, decimals, suffix in metrics:
+        values = df[column].to_numpy(dtype=float)
+
+        group_pct = np.zeros(len(values), dtype=int)
+        for m in members:
+            group_pct[m] = percentile_ranks(values[m])
+
+        index['metrics'][column] = {
+            'label': label,
+            'decimals': decimals,
+            'suffix': suffix,
+            'values': [round(float(v), decimals) for v in values],
+            'pct': percentile_ranks(values).tolist(),
+            'groupPct': group_pct.tolist(),
+            'groupTop': [highest(values, m) for m in members],
+            'national': summarize(values, decimals),
+            'groupStats': [summarize(values[m], decimals) for m in members]
+        }
+
+    return index
@@ -1,42 +1,51 @@
 """
 Generate all visualizations for the SI649 Narrative Visualization Project
-Run this script to regenerate all three visualizations from the datasets
+Run this script to regenerate all three visualizations from the datasets,
+at every breakpoint size (see responsive_variants.py), in a single pass
+
+Pass `serve` to also build a local preview (see preview_server.py) and serve it:
+    python generate_all_visualizations.py serve [port]
 """
 
-import subprocess
 import sys
 
-print("Generating all visualizations...")
-print("-" * 50)
-
-# Generate Visualization 1
-print("\n1. Generating Pet Ownership Bar Chart...")
-try:
-    subprocess.run([sys.executable, "viz1_pet_ownership.py"], check=True)
-    print("   ✓ Visualization 1 created successfully")
-except subprocess.CalledProcessError as e:
-    print(f"   ✗ Error generating Visualization 1: {e}")
-    sys.exit(1)
-
-# Generate Visualization 2
-print("\n2. Generating Regional Devotion Map...")
-try:
-    subprocess.run([sys.executable, "viz2_regional_map.py"], check=True)
-    print("   ✓ Visualization 2 created successfully")
-except subprocess.CalledProcessError as e:
-    print(f"   ✗ Error generating Visualization 2: {e}")
-    sys.exit(1)
-
-# Generate Visualization 3
-print("\n3. Generating Breed Rankings Bump Chart...")
-try:
-    subprocess.run([sys.executable, "viz3_bump_chart.py"], check=True)
-    print("   ✓ Visualization 3 created successfully")
-except subprocess.CalledProcessError as e:
-    print(f"   ✗ Error generating Visualization 3: {e}")
-    sys.exit(1)
-
-print("\n" + "-" * 50)
-print("All visualizations generated successfully!")
-print("\nOpen index.html in a web browser to view the article with visualizations.")
+import output_budget
+import responsive_variants
+
+# The guard matters: variants render in worker processes, which re-import
+# this module on platforms that spawn them (macOS, Windows)
+if __name__ == '__main__':
+    print("Generating all visualizations...")
+    print("-" * 50)
+
+    try:
+        report = responsive_variants.generate_all()
+    except Exception as e:
+        print(f"\n   ✗ Error generating visualizations: {e}")
+        sys.exit(1)
+
+    sizes = ', '.join(responsive_variants.BREAKPOINTS)
+    for number, (label, errors) in enumerate(report, start=1):
+        print(f"\n{number}. Generating {label}...")
+        print(f"   ✓ Visualization {number} created successfully ({sizes})")
+        for error in errors:
+            print(f"   ! Static image skipped for {error}")
+
+    # Size and render-cost check; over-budget files are reported, not fatal
+    print("\nOutput budgets (see output_budget.py):")
+    results = output_budget.analyze_outputs()
+    output_budget.report(results, output_budget.load_last_run())
+    output_budget.record_run(results)
+
+    print("\n" + "-" * 50)
+    print("All visualizations generated successfully!")
+    print("\nOpen index.html in a web browser to view the article with visualizations.")
+
+    # Optionally build and serve a local preview of the article
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        import preview_server
 
+        print("\nBuilding preview site...")
+        manifest = preview_server.build_site()
+        preview_server.report_transfer_sizes(manifest)
+        preview_server.serve(int(sys.argv[2]) if len(sys.argv) > 2 else 8000)
@@ -0,0 +1,309 @@
+"""
+Household Survey Microdata: Out-of-Core Aggregation
+Converts weighted household-level survey microdata into a memory-mapped
+columnar store, then derives the species ownership figures used by
+Visualization 1 with chunked, vectorized reductions
+
+Usage:
+    python household_microdata.py convert <microdata.csv> [store_dir]
+    python household_microdata.py aggregate [store_dir]
+    python household_microdata.py check
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Default location of the converted store (one binary file per column)
+MICRODATA_STORE = 'datasets/pet_ownership_microdata'
+
+# Name of the survey weight column (number of U.S. households each row represents)
+WEIGHT_COLUMN = 'Household_Weight'
+
+# Microdata ownership flag column (0/1) -> species label used in the chart data
+SPECIES_COLUMNS = {
+    'Owns_Dogs': 'Dogs',
+    'Owns_Cats': 'Cats',
+    'Owns_Fish': 'Fish',
+    'Owns_Reptiles': 'Reptiles',
+    'Owns_Birds': 'Birds',
+    'Owns_Small_Mammals': 'Small mammals (gerbils, hamsters, etc.)',
+    'Owns_Rabbits': 'Rabbits',
+    'Owns_Horses': 'Horses',
+    'Owns_Poultry': 'Poultry'
+}
+
+# On-disk dtype per column: float64 weights keep the totals exact enough for
+# tens of millions of rows, uint8 flags keep the ownership columns small
+WEIGHT_DTYPE = np.float64
+FLAG_DTYPE = np.uint8
+
+# Stored flag for a household that didn't answer for a species
+MISSING_FLAG = 255
+
+METADATA_FILE = 'metadata.json'
+
+# Rows read from the CSV per conversion step, and rows reduced per aggregation step
+CONVERT_CHUNKSIZE = 1_000_000
+AGGREGATE_CHUNKSIZE = 4_000_000
+
+
+def convert_microdata(csv_path, store_dir=MICRODATA_STORE, chunksize=CONVERT_CHUNKSIZE):
+    """Stream the microdata CSV into one raw binary file per column.
+
+    The CSV is only ever held in memory one chunk at a time. Missing weights
+    are stored as 0, so the row counts for nothing. Missing flags are stored as
+    MISSING_FLAG, so the household is left out of that species' percentage
+    rather than counted as not owning one. Flags other than 0, 1 or missing and
+    negative weights raise ValueError.
+
+    The store is written to a temporary directory next to `store_dir` and only
+    moved into place once complete, so a failed or interrupted conversion
+    leaves any previous store untouched.
+    """
+    store_dir = os.path.normpath(store_dir)
+    parent = os.path.dirname(store_dir) or '.'
+    os.makedirs(parent, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=f".{os.path.basename(store_dir)}.", dir=parent)
+    try:
+        n_rows = write_store(csv_path, staging_dir, chunksize)
+
+        # Swap the finished store in; a directory can't be replaced while it
+        # holds files, so the old one is moved aside first
+        if os.path.exists(store_dir):
+            old_dir = staging_dir + '.old'
+            os.replace(store_dir, old_dir)
+            os.replace(staging_dir, store_dir)
+            shutil.rmtree(old_dir)
+        else:
+            os.replace(staging_dir, store_dir)
+    finally:
+        if os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir)
+
+    return n_rows
+
+
+def write_store(csv_path, store_dir, chunksize=CONVERT_CHUNKSIZE):
+    """Write the column files and metadata for convert_microdata into an empty directory."""
+    columns = [WEIGHT_COLUMN] + list(SPECIES_COLUMNS)
+    dtypes = {column: FLAG_DTYPE for column in SPECIES_COLUMNS}
+    dtypes[WEIGHT_COLUMN] = WEIGHT_DTYPE
+
+    files = {column: open(os.path.join(store_dir, column + '.bin'), 'wb') for column in columns}
+    n_rows = 0
+    try:
+        for chunk in pd.read_csv(csv_path, usecols=columns, chunksize=chunksize):
+            weights = chunk[WEIGHT_COLUMN]
+            if (weights < 0).any():
+                row = n_rows + int(np.argmax((weights < 0).to_numpy()))
+                raise ValueError(f"Negative {WEIGHT_COLUMN} in data row {row}")
+            weights.fillna(0).to_numpy(dtype=WEIGHT_DTYPE).tofile(files[WEIGHT_COLUMN])
+
+            for column in SPECIES_COLUMNS:
+                flags = chunk[column]
+                invalid = flags.notna() & ~flags.isin([0, 1])
+                if invalid.any():
+                    row = n_rows + int(np.argmax(invalid.to_numpy()))
+                    raise ValueError(f"{column} must be 0, 1 or empty; got {flags[invalid].iloc[0]} in data row {row}")
+                flags.fillna(MISSING_FLAG).to_numpy(dtype=FLAG_DTYPE).tofile(files[column])
+            n_rows += len(chunk)
+    finally:
+        for f in files.values():
+            f.close()
+
+    metadata = {
+        'n_rows': n_rows,
+        'weight_column': WEIGHT_COLUMN,
+        'missing_flag': MISSING_FLAG,
+        'columns': {column: np.dtype(dtypes[column]).str for column in columns}
+    }
+    with open(os.path.join(store_dir, METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+
+    return n_rows
+
+
+def open_store(store_dir=MICRODATA_STORE):
+    """Return the store's metadata and a read-only memmap for every column.
+
+    Raises ValueError if a column file doesn't hold exactly `n_rows` values.
+    """
+    with open(os.path.join(store_dir, METADATA_FILE), encoding='utf-8') as f:
+        metadata = json.load(f)
+
+    n_rows = metadata['n_rows']
+    columns = {}
+    for column, dtype in metadata['columns'].items():
+        path = os.path.join(store_dir, column + '.bin')
+        expected = n_rows * np.dtype(dtype).itemsize
+        size = os.path.getsize(path) if os.path.exists(path) else None
+        if size != expected:
+            found = 'missing' if size is None else f"{size:,} bytes"
+            raise ValueError(
+                f"Microdata store {store_dir} is incomplete: {column}.bin is {found}, "
+                f"expected {expected:,} for {n_rows:,} rows; convert the microdata again"
+            )
+        # np.memmap rejects zero-length files, so an empty store gets empty arrays
+        if n_rows == 0:
+            columns[column] = np.empty(0, dtype=dtype)
+        else:
+            columns[column] = np.memmap(path, dtype=dtype, mode='r', shape=(n_rows,))
+
+    return metadata, columns
+
+
+def weighted_ownership(store_dir=MICRODATA_STORE, chunksize=AGGREGATE_CHUNKSIZE):
+    """Unrounded weighted ownership per species.
+
+    Returns (flag columns, percent owning, households owning). Each species'
+    percentage only uses households that answered for that species; the
+    household count applies that percentage to the total weight, so
+    non-response doesn't shrink it either. Memory use is bounded by
+    `chunksize` rows regardless of the store size.
+    """
+    metadata, columns = open_store(store_dir)
+    n_rows = metadata['n_rows']
+    missing = metadata['missing_flag']
+    weights = columns[metadata['weight_column']]
+    flag_columns = [column for column in SPECIES_COLUMNS if column in columns]
+
+    total_weight = 0.0
+    answered = np.zeros(len(flag_columns), dtype=np.float64)
+    owning = np.zeros(len(flag_columns), dtype=np.float64)
+
+    # Reusable buffers, so each chunk costs a single weights slice plus these
+    # no matter how many species there are
+    size = min(chunksize, n_rows)
+    mask_buffer = np.empty(size, dtype=bool)
+    float_buffer = np.empty(size, dtype=np.float64)
+
+    for start in range(0, n_rows, chunksize):
+        stop = min(start + chunksize, n_rows)
+        w = np.asarray(weights[start:stop])
+        total_weight += w.sum()
+
+        mask = mask_buffer[:stop - start]
+        as_float = float_buffer[:stop - start]
+        for i, column in enumerate(flag_columns):
+            flags = columns[column][start:stop]
+
+            np.not_equal(flags, missing, out=mask)
+            np.copyto(as_float, mask)
+            answered[i] += as_float @ w
+
+            np.equal(flags, 1, out=mask)
+            np.copyto(as_float, mask)
+            owning[i] += as_float @ w
+
+    share = np.divide(owning, answered, out=np.zeros_like(owning), where=answered > 0)
+    return flag_columns, share * 100, share * total_weight
+
+
+def aggregate_ownership(store_dir=MICRODATA_STORE, chunksize=AGGREGATE_CHUNKSIZE):
+    """Compute weighted ownership totals and percentages per species.
+
+    Returns a DataFrame with one row per species and the columns
+    Species, Percent_US_Households_Owning and Millions (households, in millions),
+    rounded like the pre-aggregated CSV. See weighted_ownership.
+    """
+    flag_columns, percent, households = weighted_ownership(store_dir, chunksize)
+
+    return pd.DataFrame({
+        'Species': [SPECIES_COLUMNS[column] for column in flag_columns],
+        'Percent_US_Households_Owning': percent.round(1),
+        'Millions': (households / 1e6).round(1)
+    })
+
+
+def check(n_rows=3001):
+    """Convert synthetic microdata and compare against a direct pandas weighted sum.
+
+    Covers missing weights and flags, chunk sizes that don't divide the row
+    count, an empty store and invalid flags. Raises AssertionError on a mismatch.
+    """
+    rng = np.random.default_rng(649)
+    df = pd.DataFrame({WEIGHT_COLUMN: rng.uniform(20, 85, n_rows)})
+    df.loc[rng.random(n_rows) < 0.02, WEIGHT_COLUMN] = np.nan
+    for column in SPECIES_COLUMNS:
+        flags = (rng.random(n_rows) < rng.uniform(0.01, 0.5)).astype(float)
+        flags[rng.random(n_rows) < 0.1] = np.nan
+        df[column] = flags
+
+    # Expected: each species' share among households that answered, scaled to all weight
+    w = df[WEIGHT_COLUMN].fillna(0)
+    expected_percent = []
+    expected_households = []
+    for column in SPECIES_COLUMNS:
+        answered = df[column].notna()
+        share = (w[answered] * df.loc[answered, column]).sum() / w[answered].sum()
+        expected_percent.append(share * 100)
+        expected_households.append(share * w.sum())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'microdata.csv')
+        store = os.path.join(tmp, 'store')
+        df.to_csv(csv_path, index=False)
+        assert convert_microdata(csv_path, store, chunksize=700) == n_rows
+
+        for chunksize in (1, 997, 2048, n_rows * 2):
+            _, percent, households = weighted_ownership(store, chunksize)
+            assert np.allclose(percent, expected_percent), chunksize
+            assert np.allclose(households, expected_households), chunksize
+
+        # Flags outside 0/1 are rejected rather than wrapped into uint8, and a
+        # conversion failing in a later chunk leaves the previous store intact
+        bad = df.copy()
+        bad.loc[n_rows - 5, 'Owns_Dogs'] = 2
+        bad.to_csv(csv_path, index=False)
+        try:
+            convert_microdata(csv_path, store, chunksize=700)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("flag value 2 was accepted")
+        _, percent, _ = weighted_ownership(store)
+        assert np.allclose(percent, expected_percent)
+        assert sorted(os.listdir(tmp)) == ['microdata.csv', 'store']
+
+        # A truncated column file is reported, not read past its end
+        with open(os.path.join(store, 'Owns_Cats.bin'), 'r+b') as f:
+            f.truncate(n_rows - 1)
+        try:
+            open_store(store)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("truncated column file was accepted")
+
+        # Empty store: header only
+        df.head(0).to_csv(csv_path, index=False)
+        assert convert_microdata(csv_path, store) == 0
+        empty = aggregate_ownership(store)
+        assert len(empty) == len(SPECIES_COLUMNS)
+        assert (empty['Percent_US_Households_Owning'] == 0).all() and (empty['Millions'] == 0).all()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in ('convert', 'aggregate', 'check'):
+        print(__doc__.strip().split('Usage:')[1].rstrip())
+        sys.exit(1)
+
+    if sys.argv[1] == 'check':
+        check()
+        print("Microdata conversion and aggregation match pandas")
+    elif sys.argv[1] == 'convert':
+        if len(sys.argv) < 3:
+            print("Missing path to the microdata CSV")
+            sys.exit(1)
+        store = sys.argv[3] if len(sys.argv) > 3 else MICRODATA_STORE
+        rows = convert_microdata(sys.argv[2], store)
+        print(f"Converted {rows:,} households to {store}")
+    else:
+        store = sys.argv[2] if len(sys.argv) > 2 else MICRODATA_STORE
+        print(aggregate_ownership(store).to_string(index=False))
@@ -0,0 +1,410 @@
+"""
+Output Budget Analyzer
+Breaks every generated viz*.html (including the responsive variants) down by
+component: figure JSON, inlined data, injected CSS, injected JavaScript and
+page boilerplate. Counts data points and rendered marks per chart, flags
+charts over the byte and mark budgets, and records every run to a history
+file so growth in bytes, data points and marks between builds shows up as a
+delta.
+
+Inlined data is measured from the bytes actually in the page, so it can't
+exceed the file however the page serialized it.
+
+Usage:
+    python output_budget.py [--max-bytes 60000] [--max-marks 5000] [--no-record]
+    python output_budget.py check
+"""
+
+import argparse
+import base64
+import glob
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+# Default budgets per generated file
+MAX_BYTES = 60_000
+MAX_MARKS = 5_000
+
+HISTORY_FILE = 'output_budget_history.jsonl'
+
+OUTPUT_PATTERNS = ['viz*.html', 'responsive/viz*.html']
+
+COMPONENTS = ['figure_json', 'inlined_data', 'injected_css', 'injected_js', 'boilerplate']
+
+# `var <name> = {...}` literals that hold the chart definition rather than data
+FIGURE_VARIABLES = {'spec', 'embedOpt'}
+
+# Bytes per item for Plotly's base64-encoded ("bdata") arrays
+BDATA_ITEM_SIZES = {'i1': 1, 'u1': 1, 'i2': 2, 'u2': 2, 'i4': 4, 'u4': 4, 'f4': 4, 'f8': 8}
+
+# Array-valued Plotly trace attributes that are styling, not data
+PLOTLY_STYLE_ARRAYS = {'colorscale'}
+
+# Vega-Lite views that contain other views
+COMPOSITE_KEYS = ['layer', 'hconcat', 'vconcat', 'concat']
+
+DECODER = json.JSONDecoder()
+
+
+def nbytes(text):
+    return len(text.encode('utf-8'))
+
+
+def skip_space(text, position):
+    while position < len(text) and text[position].isspace():
+        position += 1
+    return position
+
+
+def decode_at(text, start):
+    """Decode the JSON value starting at (or after whitespace from) `start`.
+
+    Returns (value, start, end) with `start`/`end` delimiting the JSON text.
+    """
+    start = skip_space(text, start)
+    value, end = DECODER.raw_decode(text, start)
+    return value, start, end
+
+
+def decode_spans(text, start):
+    """Like decode_at, plus where every container member sits in `text`.
+
+    Returns (value, spans, start, end). `spans` mirrors the value: a dict of
+    key -> (spans, start, end) for objects, a list of (spans, start, end) for
+    arrays holding objects or arrays, and None otherwise.
+    """
+    start = skip_space(text, start)
+    if text.startswith('[', start):
+        value, end = DECODER.raw_decode(text, start)
+        if not any(isinstance(item, (dict, list)) for item in value):
+            return value, None, start, end
+
+        # Walk the items again for their positions
+        spans = []
+        position = skip_space(text, start + 1)
+        for _ in value:
+            _, item_spans, item_start, position = decode_spans(text, position)
+            spans.append((item_spans, item_start, position))
+            position = skip_space(text, skip_space(text, position) + 1)
+        return value, spans, start, end
+
+    if text.startswith('{', start):
+        value, spans = {}, {}
+        position = skip_space(text, start + 1)
+        while not text.startswith('}', position):
+            key, position = DECODER.raw_decode(text, position)
+            position = skip_space(text, position) + 1
+            value[key], member_spans, member_start, position = decode_spans(text, position)
+            spans[key] = (member_spans, member_start, position)
+            position = skip_space(text, position)
+            if text.startswith(',', position):
+                position = skip_space(text, position + 1)
+            elif not text.startswith('}', position):
+                raise ValueError(f"Expected ',' or '}}' at {position}")
+        return value, spans, start, position + 1
+
+    value, end = DECODER.raw_decode(text, start)
+    return value, None, start, end
+
+
+def array_length(value):
+    """Number of items in a trace array, including Plotly's base64 arrays."""
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, dict) and 'bdata' in value:
+        if 'shape' in value:
+            length = 1
+            for dim in str(value['shape']).split(','):
+                length *= int(dim)
+            return length
+        return len(base64.b64decode(value['bdata'])) // BDATA_ITEM_SIZES.get(value.get('dtype'), 1)
+    return 0
+
+
+def is_data_array(value):
+    return isinstance(value, list) or (isinstance(value, dict) and 'bdata' in value)
+
+
+def span_bytes(text, span):
+    _, start, end = span
+    return nbytes(text[start:end])
+
+
+def plotly_counts(traces, spans, text):
+    """(data bytes, data points, marks) for a list of Plotly traces.
+
+    Every array-valued trace attribute (locations, z, text, ...) is inlined
+    data, measured from its bytes in `text` (see decode_spans). A trace has
+    one data point per item of its longest array and draws one mark for each.
+    """
+    data_bytes = points = 0
+    for trace, (trace_spans, _, _) in zip(traces, spans or []):
+        arrays = [
+            key for key, value in trace.items()
+            if key not in PLOTLY_STYLE_ARRAYS and is_data_array(value)
+        ]
+        data_bytes += sum(span_bytes(text, trace_spans[key]) for key in arrays)
+        points += max((array_length(trace[key]) for key in arrays), default=0)
+    return data_bytes, points, points
+
+
+def vegalite_marks(view, datasets, rows=0):
+    """Marks drawn by a Vega-Lite view: one per data row for every mark, summed over layers.
+
+    This is an upper-bound proxy (aggregates and filters can draw fewer),
+    which is what a budget should track.
+    """
+    data = view.get('data', {})
+    if 'name' in data:
+        rows = len(datasets.get(data['name'], []))
+    elif 'values' in data:
+        rows = len(data['values'])
+
+    if 'mark' in view:
+        return rows
+    return sum(
+        vegalite_marks(child, datasets, rows)
+        for key in COMPOSITE_KEYS for child in view.get(key, [])
+    )
+
+
+def vegalite_counts(spec, spans, text):
+    """(data bytes, data points, marks) for a Vega-Lite spec, measuring data from `text`."""
+    datasets = spec.get('datasets', {})
+    data_bytes = span_bytes(text, spans['datasets']) if datasets else 0
+    points = sum(len(rows) for rows in datasets.values())
+
+    # Inline `data.values` anywhere in the view tree counts as data too
+    stack = [(spec, spans)]
+    while stack:
+        view, view_spans = stack.pop()
+        values = view.get('data', {}).get('values')
+        if values is not None:
+            data_bytes += span_bytes(text, view_spans['data'][0]['values'])
+            points += len(values)
+        stack.extend(
+            (child, child_spans)
+            for key in COMPOSITE_KEYS if key in view
+            for child, (child_spans, _, _) in zip(view[key], view_spans[key][0])
+        )
+
+    return data_bytes, points, vegalite_marks(spec, datasets)
+
+
+def analyze_script(script, result):
+    """Attribute an inline script's bytes to figure JSON, inlined data or JS."""
+    claimed = 0
+
+    # Plotly: Plotly.newPlot("id", traces, layout, config)
+    match = re.search(r'Plotly\.newPlot\(\s*"[^"]*"\s*,', script)
+    traces = None
+    if match:
+        try:
+            traces, spans, start, end = decode_spans(script, match.end())
+        except ValueError:
+            # Traces built in JavaScript rather than inlined as JSON; leave them to injected_js
+            pass
+    if isinstance(traces, list):
+        data_bytes, points, marks = plotly_counts(traces, spans, script)
+        figure_bytes = nbytes(script[start:end]) - data_bytes
+        position = end
+        # Layout and config follow, comma separated
+        for _ in range(2):
+            comma = script.find(',', position)
+            if comma < 0:
+                break
+            try:
+                _, start, end = decode_at(script, comma + 1)
+            except ValueError:
+                break
+            figure_bytes += nbytes(script[start:end])
+            position = end
+        result['figure_json'] += figure_bytes
+        result['inlined_data'] += data_bytes
+        result['data_points'] += points
+        result['marks'] += marks
+        claimed += figure_bytes + data_bytes
+
+    # `var name = {...}` literals: the Vega-Lite spec, or data shipped to the page
+    for match in re.finditer(r'\bvar\s+(\w+)\s*=\s*(?=[\[{])', script):
+        try:
+            value, spans, start, end = decode_spans(script, match.end())
+        except ValueError:
+            # A JavaScript object literal rather than JSON; leave it to injected_js
+            continue
+        size = nbytes(script[start:end])
+        claimed += size
+        if match.group(1) == 'spec' and isinstance(value, dict):
+            data_bytes, points, marks = vegalite_counts(value, spans, script)
+            result['figure_json'] += size - data_bytes
+            result['inlined_data'] += data_bytes
+            result['data_points'] += points
+            result['marks'] += marks
+        elif match.group(1) in FIGURE_VARIABLES:
+            result['figure_json'] += size
+        else:
+            result['inlined_data'] += size
+
+    result['injected_js'] += nbytes(script) - claimed
+
+
+def analyze_file(path):
+    """Component byte breakdown plus data point and mark counts for one output."""
+    with open(path, encoding='utf-8') as f:
+        html = f.read()
+
+    result = {component: 0 for component in COMPONENTS}
+    result.update({'bytes': nbytes(html), 'data_points': 0, 'marks': 0})
+
+    for match in re.finditer(r'<style[^>]*>(.*?)</style>', html, re.S):
+        result['injected_css'] += nbytes(match.group(1))
+
+    for match in re.finditer(r'<script[^>]*>(.*?)</script>', html, re.S):
+        if match.group(1).strip():
+            analyze_script(match.group(1), result)
+
+    result['boilerplate'] = result['bytes'] - sum(result[c] for c in COMPONENTS if c != 'boilerplate')
+
+    # Every component is a disjoint slice of the file, so they must add up to it
+    negative = [c for c in COMPONENTS if result[c] < 0]
+    if negative or sum(result[c] for c in COMPONENTS) != result['bytes']:
+        raise ValueError(f"{path}: component sizes don't add up to the file ({', '.join(negative)} negative)")
+    return result
+
+
+def analyze_outputs(patterns=OUTPUT_PATTERNS):
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    return {path.replace(os.sep, '/'): analyze_file(path) for path in paths}
+
+
+def over_budget(result, max_bytes=MAX_BYTES, max_marks=MAX_MARKS):
+    """Human-readable list of the budgets a file exceeds."""
+    problems = []
+    if result['bytes'] > max_bytes:
+        problems.append(f"{result['bytes']:,} bytes > {max_bytes:,}")
+    if result['marks'] > max_marks:
+        problems.append(f"{result['marks']:,} marks > {max_marks:,}")
+    return problems
+
+
+def load_last_run(history_file=HISTORY_FILE):
+    if not os.path.exists(history_file):
+        return None
+    last = None
+    with open(history_file, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                last = json.loads(line)
+    return last
+
+
+def record_run(results, history_file=HISTORY_FILE):
+    run = {'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'files': results}
+    with open(history_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run, separators=(',', ':')) + '\n')
+
+
+def report(results, previous=None, max_bytes=MAX_BYTES, max_marks=MAX_MARKS):
+    """Print the breakdown table. Returns the number of files over budget."""
+
+    def kb(n):
+        return f"{n / 1024:.1f}"
+
+    # Size and render cost both get a delta against the previous run
+    deltas = ['bytes', 'data_points', 'marks']
+
+    previous_files = previous['files'] if previous else {}
+    headers = ['Total KB', 'Figure', 'Data', 'CSS', 'JS', 'Other', 'Points', 'Marks', 'Δ bytes', 'Δ points', 'Δ marks']
+    print(f"\n{'File':<40}" + ''.join(f"{h:>10}" for h in headers))
+
+    failures = 0
+    for path, result in results.items():
+        before = previous_files.get(path)
+        cells = [kb(result['bytes'])] + [kb(result[c]) for c in COMPONENTS]
+        cells += [f"{result['data_points']:,}", f"{result['marks']:,}"]
+        cells += [f"{result[key] - before[key]:+,}" if before else 'new' for key in deltas]
+        print(f"{path:<40}" + ''.join(f"{cell:>10}" for cell in cells))
+
+        problems = over_budget(result, max_bytes, max_marks)
+        if problems:
+            failures += 1
+            print(f"   ✗ Over budget: {'; '.join(problems)}")
+
+    print(f"\nBudgets: {max_bytes:,} bytes and {max_marks:,} marks per file")
+    if previous:
+        print(f"Δ is against the run recorded at {previous['timestamp']}")
+    return failures
+
+
+def check():
+    """Analyze synthetic pages and check the accounting. Raises AssertionError on a mismatch."""
+    import altair as alt
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    # Spans point at the exact source text, whatever the whitespace
+    text = 'x = { "a" : [1, 2] ,"b":{"c" :"<\\u003c>"}, "d": [{"e": []}] }'
+    value, spans, start, end = decode_spans(text, 3)
+    assert text[start:end] == text[4:]
+    assert text[spans['a'][1]:spans['a'][2]] == '[1, 2]'
+    assert text[spans['b'][0]['c'][1]:spans['b'][0]['c'][2]] == '"<\\u003c>"'
+    e_spans = spans['d'][0][0][0]['e']
+    assert text[e_spans[1]:e_spans[2]] == '[]' and value['d'][0]['e'] == []
+
+    n = 20_000
+    figure = go.Figure(go.Scatter(
+        x=list(range(n)), y=[i % 97 for i in range(n)], text=[f"Point {i}<br>value" for i in range(n)]
+    ))
+    chart = alt.Chart(pd.DataFrame({'x': range(500), 'y': range(500)})).mark_point().encode(x='x', y='y')
+    pages = {
+        'plotly.html': figure.to_html(include_plotlyjs='cdn'),
+        'vegalite.html': chart.to_html(),
+        'js_traces.html': '<script>Plotly.newPlot("id", traces, {});</script>'
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name, html in pages.items():
+            path = os.path.join(tmp, name)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(html)
+            # analyze_file raises if a component is negative or they don't add up
+            results[name] = analyze_file(path)
+
+    plotly = results['plotly.html']
+    assert plotly['data_points'] == n, plotly
+    assert plotly['figure_json'] > 0 and plotly['inlined_data'] > 0.9 * plotly['bytes'], plotly
+    vegalite = results['vegalite.html']
+    assert vegalite['data_points'] == 500 and vegalite['figure_json'] > 0, vegalite
+    assert results['js_traces.html']['data_points'] == 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Analyze the size and render cost of the generated visualizations')
+    parser.add_argument('command', nargs='?', choices=['report', 'check'], default='report',
+                        help='report on the generated files (default), or check the analyzer itself')
+    parser.add_argument('--max-bytes', type=int, default=MAX_BYTES, help='byte budget per file')
+    parser.add_argument('--max-marks', type=int, default=MAX_MARKS, help='mark budget per file')
+    parser.add_argument('--history', default=HISTORY_FILE, help='JSON Lines file of previous runs')
+    parser.add_argument('--no-record', action='store_true', help="don't append this run to the history")
+    args = parser.parse_args()
+
+    if args.command == 'check':
+        check()
+        print("Output analysis checks passed")
+        sys.exit(0)
+
+    results = analyze_outputs()
+    if not results:
+        print("No generated visualizations found; run generate_all_visualizations.py first")
+        sys.exit(1)
+
+    failures = report(results, load_last_run(args.history), args.max_bytes, args.max_marks)
+    if not args.no_record:
+        record_run(results, args.history)
+
+    sys.exit(1 if failures else 0)
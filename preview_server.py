@@ -0,0 +1,492 @@
+"""
+Local Preview Server
+Builds a deployable copy of the article into build/ (content-hashed asset names,
+gzip and brotli precompressed variants) and serves it with strong ETags,
+long-lived immutable caching for hashed assets, conditional requests and
+byte ranges. Prints the transfer size of every page so the real payload
+readers download can be measured.
+
+brotli is optional: without it only gzip variants are written.
+
+Usage:
+    python preview_server.py [serve] [--port 8000] [--no-build]
+    python preview_server.py check
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from responsive_variants import VARIANTS_MANIFEST
+
+BUILD_DIR = 'build'
+MANIFEST_FILE = 'manifest.json'
+
+# The entry page keeps its name so the URL stays stable; everything else is
+# copied under a content-hashed name and can be cached forever
+ENTRY_PAGE = 'index.html'
+SITE_ASSETS = [
+    'style.css',
+    'responsive_frames.js',
+    'dog.webp',
+    'favicon.png',
+    'viz1_pet_ownership.html',
+    'viz2_regional_map.html',
+    'viz3_bump_chart.html'
+]
+
+CONTENT_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'text/javascript; charset=utf-8',
+    '.json': 'application/json',
+    '.webp': 'image/webp',
+    '.png': 'image/png',
+    '.svg': 'image/svg+xml'
+}
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# Preferred order when a client accepts several encodings
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+# Image formats that are already compressed; recompressing them costs build
+# time (seconds for dog.webp at brotli quality 11) and saves next to nothing
+PRECOMPRESSED_FORMATS = {'.webp', '.png', '.jpg', '.jpeg', '.gif'}
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hashed_name(name, data):
+    """style.css -> style.1a2b3c4d.css"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{content_hash(data)[:8]}{ext}"
+
+
+def compress(data, encoding):
+    if encoding == 'gzip':
+        # mtime=0 keeps the output (and therefore its ETag) reproducible
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11)
+
+
+def write_with_variants(out_dir, name, data):
+    """Write a file and whichever precompressed variants are smaller than it."""
+    with open(os.path.join(out_dir, name), 'wb') as f:
+        f.write(data)
+
+    etag = content_hash(data)[:16]
+    entry = {'size': len(data), 'etag': etag, 'encodings': {}}
+
+    if os.path.splitext(name)[1].lower() in PRECOMPRESSED_FORMATS:
+        return entry
+
+    for encoding, suffix in ENCODINGS:
+        if encoding == 'br' and brotli is None:
+            continue
+        compressed = compress(data, encoding)
+        if len(compressed) >= len(data):
+            continue
+        with open(os.path.join(out_dir, name + suffix), 'wb') as f:
+            f.write(compressed)
+        entry['encodings'][encoding] = {
+            'path': name + suffix,
+            'size': len(compressed),
+            # Each representation needs its own strong validator
+            'etag': f"{etag}-{encoding}"
+        }
+
+    return entry
+
+
+def load_variants(source_dir='.'):
+    """Breakpoint -> {'html': [...], 'images': [...]} from responsive_variants.py, if generated."""
+    path = os.path.join(source_dir, VARIANTS_MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def build_site(out_dir=BUILD_DIR, source_dir='.'):
+    """Copy the article into out_dir with hashed asset names and precompressed variants."""
+    if brotli is None:
+        print("   Note: brotli is not installed, only gzip variants will be written")
+
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+
+    files = {}
+    renames = {}
+
+    variants = load_variants(source_dir)
+    assets = list(SITE_ASSETS)
+    for outputs in variants.values():
+        assets += [path for path in outputs['html'] + outputs['images'] if path not in assets]
+
+    for name in assets:
+        with open(os.path.join(source_dir, name), 'rb') as f:
+            data = f.read()
+        target = hashed_name(name, data)
+        os.makedirs(os.path.join(out_dir, os.path.dirname(target)), exist_ok=True)
+        renames[name] = target
+        files[target] = write_with_variants(out_dir, target, data)
+        files[target].update({'source': name, 'immutable': True})
+
+    # Point the entry page at the hashed names
+    with open(os.path.join(source_dir, ENTRY_PAGE), encoding='utf-8') as f:
+        html = f.read()
+    for name, target in renames.items():
+        html = re.sub(r'(["\'])' + re.escape(name) + r'\1', r'\g<1>' + target + r'\g<1>', html)
+
+    files[ENTRY_PAGE] = write_with_variants(out_dir, ENTRY_PAGE, html.encode('utf-8'))
+    files[ENTRY_PAGE].update({'source': ENTRY_PAGE, 'immutable': False})
+
+    # Hashed names of the chart frames each breakpoint's readers load
+    breakpoints = {
+        breakpoint: [renames[path] for path in outputs['html']]
+        for breakpoint, outputs in variants.items()
+    }
+
+    manifest = {'entry': ENTRY_PAGE, 'renames': renames, 'files': files, 'breakpoints': breakpoints}
+    with open(os.path.join(out_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def best_transfer_size(entry):
+    """Smallest number of bytes a client accepting gzip and brotli would download."""
+    return min([entry['size']] + [variant['size'] for variant in entry['encodings'].values()])
+
+
+def page_dependencies(manifest, page, breakpoint=None):
+    """Local files a page pulls in (stylesheets, images, iframes).
+
+    With a breakpoint, only that breakpoint's chart frames are counted:
+    responsive_frames.js only ever sets an iframe's src to the variant whose
+    media query matches, and the static chart images only load without
+    JavaScript.
+    """
+    if page != manifest['entry']:
+        return []
+    if breakpoint is None:
+        return list(manifest['renames'].values())
+
+    breakpoints = manifest['breakpoints']
+
+    variant_files = {
+        name for name, entry in manifest['files'].items()
+        if entry['source'].startswith(os.path.dirname(VARIANTS_MANIFEST) + '/')
+    }
+    variant_files.update(name for names in breakpoints.values() for name in names)
+    shared = [name for name in manifest['renames'].values() if name not in variant_files]
+    return shared + breakpoints[breakpoint]
+
+
+def report_transfer_sizes(manifest):
+    """Print the per-file and per-page transfer sizes for the built site."""
+    files = manifest['files']
+
+    def kb(n):
+        return f"{n / 1024:.1f} KB"
+
+    print(f"\n{'File':<44}{'Raw':>12}{'gzip':>12}{'brotli':>12}{'Sent':>12}")
+    for name, entry in sorted(files.items(), key=lambda item: item[1]['source']):
+        gz = entry['encodings'].get('gzip')
+        br = entry['encodings'].get('br')
+        print(f"{entry['source']:<44}{kb(entry['size']):>12}"
+              f"{kb(gz['size']) if gz else '-':>12}"
+              f"{kb(br['size']) if br else '-':>12}"
+              f"{kb(best_transfer_size(entry)):>12}")
+
+    # A page's payload is the page itself plus every local file it loads;
+    # third-party scripts (Vega, Plotly CDNs) are not included
+    print(f"\n{'Page':<44}{'Raw':>12}{'Sent':>12}")
+    for name, entry in sorted(files.items(), key=lambda item: item[1]['source']):
+        if not name.endswith('.html'):
+            continue
+        # The entry page's payload depends on which chart variants the viewport loads
+        breakpoints = list(manifest.get('breakpoints', {})) if name == manifest['entry'] else []
+        for breakpoint in breakpoints or [None]:
+            parts = [entry] + [files[dep] for dep in page_dependencies(manifest, name, breakpoint)]
+            raw = sum(part['size'] for part in parts)
+            sent = sum(best_transfer_size(part) for part in parts)
+            label = f"{entry['source']} ({breakpoint})" if breakpoint else entry['source']
+            print(f"{label:<44}{kb(raw):>12}{kb(sent):>12}")
+
+
+def parse_accept_encoding(header):
+    """Return the set of content codings the client accepts (q > 0)."""
+    accepted = set()
+    for item in (header or '').split(','):
+        parts = item.strip().split(';')
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(coding)
+    if '*' in accepted:
+        accepted.update(encoding for encoding, _ in ENCODINGS)
+    return accepted
+
+
+def parse_range(header, size):
+    """Parse a single `bytes=` range. Returns (start, end), None to ignore, or 'invalid'."""
+    match = re.fullmatch(r'\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*', header or '')
+    # Multiple or malformed ranges are ignored and the full body is sent
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes, or the whole file if it is shorter.
+        # An empty file has no last bytes to send
+        length = int(last)
+        if length == 0 or size == 0:
+            return 'invalid'
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return 'invalid'
+    return start, min(end, size - 1)
+
+
+def etag_matches(header, etag):
+    """If-None-Match comparison (weak, so W/ prefixes are ignored)."""
+    tags = [tag.strip() for tag in header.split(',')]
+    return '*' in tags or any(tag.removeprefix('W/') == etag for tag in tags)
+
+
+def if_range_matches(header, etag, last_modified):
+    """If-Range comparison: a strong ETag match, or an HTTP-date equal to Last-Modified.
+
+    Weak ETags and unparseable values never match, so the full body is sent.
+    """
+    header = header.strip()
+    if header.startswith('"') or header.startswith('W/'):
+        return header == etag
+    try:
+        return parsedate_to_datetime(header).timestamp() == int(last_modified)
+    except (TypeError, ValueError):
+        return False
+
+
+def check():
+    """Edge cases of the request header parsing. Raises AssertionError on a mismatch."""
+    # Ranges against a 100-byte file
+    assert parse_range('bytes=0-9', 100) == (0, 9)
+    assert parse_range('bytes=90-', 100) == (90, 99)
+    assert parse_range('bytes=90-500', 100) == (90, 99)
+    assert parse_range('bytes=-10', 100) == (90, 99)
+    assert parse_range('bytes=-500', 100) == (0, 99)
+    assert parse_range(' bytes = 5 - 6 ', 100) == (5, 6)
+    assert parse_range('bytes=100-', 100) == 'invalid'
+    assert parse_range('bytes=9-0', 100) == 'invalid'
+    assert parse_range('bytes=-0', 100) == 'invalid'
+    # Multiple, malformed and other-unit ranges are ignored
+    for header in (None, '', 'bytes=0-1,5-6', 'bytes=-', 'bytes=a-b', 'items=0-1', 'bytes=-1-2'):
+        assert parse_range(header, 100) is None, header
+    # Nothing in an empty file is satisfiable
+    assert parse_range('bytes=0-', 0) == 'invalid'
+    assert parse_range('bytes=-5', 0) == 'invalid'
+
+    assert parse_accept_encoding(None) == set()
+    assert parse_accept_encoding('gzip, deflate, br') == {'gzip', 'deflate', 'br'}
+    assert parse_accept_encoding('GZIP;q=0.5, br;q=0') == {'gzip'}
+    assert parse_accept_encoding('br; q=1.0 , gzip;q=bogus') == {'br'}
+    assert parse_accept_encoding('*') == {'*', 'br', 'gzip'}
+    assert parse_accept_encoding(' , identity') == {'identity'}
+
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches('*', '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+    assert not etag_matches('', '"abc"')
+
+    modified = 1700000000
+    assert if_range_matches('"abc"', '"abc"', modified)
+    assert not if_range_matches('W/"abc"', '"abc"', modified)
+    assert not if_range_matches('"other"', '"abc"', modified)
+    assert if_range_matches(formatdate(modified, usegmt=True), '"abc"', modified + 0.5)
+    assert not if_range_matches(formatdate(modified - 60, usegmt=True), '"abc"', modified)
+    assert not if_range_matches('yesterday', '"abc"', modified)
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    """Serves only the files listed in the build manifest."""
+
+    server_version = 'SI649Preview/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self.handle_get(send_body=False)
+
+    def do_GET(self):
+        self.handle_get(send_body=True)
+
+    def handle_get(self, send_body):
+        path = self.path.split('?', 1)[0].split('#', 1)[0]
+        name = path.lstrip('/') or self.server.manifest['entry']
+        entry = self.server.manifest['files'].get(name)
+        if entry is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        # Pick the smallest representation the client accepts
+        accepted = parse_accept_encoding(self.headers.get('Accept-Encoding'))
+        encoding = None
+        file_name, size, tag = name, entry['size'], entry['etag']
+        for candidate, _ in ENCODINGS:
+            variant = entry['encodings'].get(candidate)
+            if variant and candidate in accepted:
+                encoding = candidate
+                file_name, size, tag = variant['path'], variant['size'], variant['etag']
+                break
+        etag = f'"{tag}"'
+
+        file_path = os.path.join(self.server.build_dir, file_name)
+        last_modified = os.path.getmtime(file_path)
+
+        headers = {
+            'ETag': etag,
+            'Last-Modified': formatdate(last_modified, usegmt=True),
+            'Cache-Control': IMMUTABLE_CACHE_CONTROL if entry['immutable'] else REVALIDATE_CACHE_CONTROL,
+            'Content-Type': CONTENT_TYPES.get(os.path.splitext(name)[1], 'application/octet-stream'),
+            'Accept-Ranges': 'bytes',
+            'Vary': 'Accept-Encoding'
+        }
+        if encoding:
+            headers['Content-Encoding'] = encoding
+
+        # Conditional requests: If-None-Match wins over If-Modified-Since
+        if_none_match = self.headers.get('If-None-Match')
+        if_modified_since = self.headers.get('If-Modified-Since')
+        not_modified = False
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, etag)
+        elif if_modified_since:
+            try:
+                not_modified = int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                not_modified = False
+        if not_modified:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for key, value in headers.items():
+                if key not in ('Content-Type', 'Accept-Ranges'):
+                    self.send_header(key, value)
+            self.end_headers()
+            return
+
+        # Range requests, honoured only if If-Range (when present) still matches
+        byte_range = None
+        if 'Range' in self.headers:
+            if_range = self.headers.get('If-Range')
+            if if_range is None or if_range_matches(if_range, etag, last_modified):
+                byte_range = parse_range(self.headers['Range'], size)
+
+        if byte_range == 'invalid':
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        start, end = byte_range if byte_range else (0, size - 1)
+        length = end - start + 1 if size else 0
+
+        self.send_response(HTTPStatus.PARTIAL_CONTENT if byte_range else HTTPStatus.OK)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if byte_range:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Content-Length', str(length))
+        self.end_headers()
+
+        if send_body and length:
+            with open(file_path, 'rb') as f:
+                f.seek(start)
+                self.wfile.write(f.read(length))
+
+        self.server.log_transfer(name, encoding, length if send_body else 0)
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"   {self.address_string()} {format % args}\n")
+
+
+class PreviewServer(ThreadingHTTPServer):
+    """Threaded HTTP server that also tallies the bytes sent per file."""
+
+    def __init__(self, address, build_dir=BUILD_DIR):
+        with open(os.path.join(build_dir, MANIFEST_FILE), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.build_dir = build_dir
+        self.bytes_sent = {}
+        super().__init__(address, PreviewHandler)
+
+    def log_transfer(self, name, encoding, length):
+        source = self.manifest['files'][name]['source']
+        self.bytes_sent[source] = self.bytes_sent.get(source, 0) + length
+
+
+def serve(port=8000, build_dir=BUILD_DIR):
+    httpd = PreviewServer(('127.0.0.1', port), build_dir)
+    print(f"\nServing {build_dir}/ at http://127.0.0.1:{port}/ (Ctrl+C to stop)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        if httpd.bytes_sent:
+            print("\nBytes sent this session:")
+            for source, total in sorted(httpd.bytes_sent.items()):
+                print(f"   {source:<44}{total / 1024:>10.1f} KB")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build and serve a local preview of the article')
+    parser.add_argument('command', nargs='?', choices=['serve', 'check'], default='serve',
+                        help='serve the preview (default), or check the request header parsing')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--no-build', action='store_true', help='serve the existing build/ without rebuilding')
+    args = parser.parse_args()
+
+    if args.command == 'check':
+        check()
+        print("Range, Accept-Encoding, ETag and If-Range parsing checks passed")
+        sys.exit(0)
+
+    if not args.no_build:
+        print("Building preview site...")
+        report_transfer_sizes(build_site())
+
+    serve(args.port)
@@ -0,0 +1,62 @@
+/*
+ * Responsive chart frames
+ * Each chart is a single iframe with one data-src-<breakpoint> and
+ * data-height-<breakpoint> per size variant (see responsive_variants.py).
+ * Only the variant whose data-media-<breakpoint> query matches the viewport
+ * is ever assigned to src, so a phone never downloads the desktop charts.
+ * A chart can ask for a taller frame (the Visualization 2 comparison panel
+ * flows below the map on narrow screens) by posting {vizFrameHeight: n}.
+ */
+(function () {
+    function breakpoints(frame) {
+        return frame.dataset.breakpoints.split(' ');
+    }
+
+    function capitalize(text) {
+        return text.charAt(0).toUpperCase() + text.slice(1);
+    }
+
+    function currentBreakpoint(frame) {
+        const names = breakpoints(frame);
+        // The last (largest) variant if no query matches
+        return names.find(bp => window.matchMedia(frame.dataset['media' + capitalize(bp)]).matches)
+            || names[names.length - 1];
+    }
+
+    function chooseVariant(frame) {
+        const name = currentBreakpoint(frame);
+        const src = frame.dataset['src' + capitalize(name)];
+        if (frame.getAttribute('src') !== src) {
+            frame.height = frame.dataset['height' + capitalize(name)];
+            frame.src = src;
+        }
+    }
+
+    // Grow (or shrink back) a frame to its content, never below the variant's own height
+    function resizeFrame(event) {
+        if (!event.data || typeof event.data.vizFrameHeight !== 'number') return;
+        document.querySelectorAll('iframe.viz-frame[data-breakpoints]').forEach(frame => {
+            if (frame.contentWindow !== event.source) return;
+            const minimum = Number(frame.dataset['height' + capitalize(currentBreakpoint(frame))]);
+            frame.height = Math.max(minimum, Math.ceil(event.data.vizFrameHeight));
+        });
+    }
+
+    function init() {
+        window.addEventListener('message', resizeFrame);
+        document.querySelectorAll('iframe.viz-frame[data-breakpoints]').forEach(frame => {
+            chooseVariant(frame);
+            // Swap variants when the viewport crosses a breakpoint (rotation, resizing)
+            breakpoints(frame).forEach(bp => {
+                window.matchMedia(frame.dataset['media' + capitalize(bp)])
+                    .addEventListener('change', () => chooseVariant(frame));
+            });
+        });
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', init);
+    } else {
+        init();
+    }
+})();
@@ -0,0 +1,247 @@
+"""
+Responsive Chart Variants
+Renders every visualization at several breakpoint sizes in one pass: each
+dataset is loaded and each chart spec is built once, then every size variant
+(interactive HTML plus a static PNG) is rendered in parallel. index.html is
+updated with one iframe per chart listing every variant; responsive_frames.js
+loads only the variant whose media query matches, so hidden variants are never
+downloaded.
+"""
+
+import html
+import importlib
+import json
+import os
+import re
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+# Breakpoint name -> media query, smallest first. The .02px offsets leave no
+# gap at fractional widths (browser zoom) between one breakpoint and the next
+BREAKPOINTS = {
+    'sm': '(max-width: 480px)',
+    'md': '(min-width: 480.02px) and (max-width: 768px)',
+    'lg': '(min-width: 768.02px)'
+}
+
+# Narrowest viewport each breakpoint covers (sm starts at the smallest common phone)
+MIN_VIEWPORTS = {'sm': 320, 'md': 480, 'lg': 768}
+
+# Horizontal space style.css takes around a chart iframe: .article padding plus
+# .visualization padding and border, on both sides (.article padding drops to
+# 15px at 768px and below)
+PAGE_GUTTERS = {'sm': 2 * (15 + 20 + 1), 'md': 2 * (15 + 20 + 1), 'lg': 2 * (20 + 20 + 1)}
+
+# Default 8px body margin, on both sides, of the chart pages inside the iframe
+CHART_PAGE_MARGIN = 2 * 8
+
+# Visualization module, progress label and the id of its container in index.html
+VISUALIZATIONS = [
+    ('viz1_pet_ownership', 'Pet Ownership Bar Chart', 'pet-ownership-chart'),
+    ('viz2_regional_map', 'Regional Devotion Map', 'regional-map'),
+    ('viz3_bump_chart', 'Breed Rankings Bump Chart', 'bump-chart')
+]
+
+VARIANTS_DIR = 'responsive'
+VARIANTS_MANIFEST = os.path.join(VARIANTS_DIR, 'variants.json')
+INDEX_FILE = 'index.html'
+
+
+def frame_width(breakpoint):
+    """Width of a chart iframe at the narrowest viewport of `breakpoint`."""
+    return MIN_VIEWPORTS[breakpoint] - PAGE_GUTTERS[breakpoint]
+
+
+def chart_width(breakpoint):
+    """Widest a rendered chart (axes, legend and page extras included) can be at `breakpoint`."""
+    return frame_width(breakpoint) - CHART_PAGE_MARGIN
+
+
+def check_sizes(module):
+    """Raise ValueError if any of the module's SIZES can't fit its breakpoint's frame.
+
+    A module's SIZES width is the whole chart; PAGE_EXTRA_WIDTH is what its
+    HTML page adds beside the chart (e.g. the Vega-Embed actions menu).
+    """
+    for breakpoint in BREAKPOINTS:
+        width = module.SIZES[breakpoint][0] + module.PAGE_EXTRA_WIDTH
+        if width > chart_width(breakpoint):
+            raise ValueError(
+                f"{module.__name__} {breakpoint} is {width}px wide but the frame fits "
+                f"{chart_width(breakpoint)}px at a {MIN_VIEWPORTS[breakpoint]}px viewport"
+            )
+
+
+def image_size(path):
+    """(width, height) in pixels of a PNG, read from its header."""
+    with open(path, 'rb') as f:
+        header = f.read(24)
+    return struct.unpack('>II', header[16:24])
+
+
+def variant_paths(module, breakpoint):
+    """HTML and PNG paths for one variant.
+
+    The desktop HTML keeps its original name so the standalone scripts and
+    existing links still point at it.
+    """
+    stem = os.path.splitext(module.OUTPUT_FILE)[0]
+    image_path = f"{VARIANTS_DIR}/{stem}.{breakpoint}.png"
+    if breakpoint == 'lg':
+        return module.OUTPUT_FILE, image_path
+    return f"{VARIANTS_DIR}/{stem}.{breakpoint}.html", image_path
+
+
+def render_variant(module_name, chart, df, html_path, image_path):
+    """Worker: write one variant's HTML and static image.
+
+    Returns the image error message, or None if the image was written. Static
+    images need vl-convert (Altair) or kaleido with Chrome (Plotly), so a
+    failure there is reported rather than raised. The previous image is removed
+    first so a failed render never leaves a stale one behind.
+    """
+    module = importlib.import_module(module_name)
+
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(module.render_html(chart, df))
+
+    if os.path.exists(image_path):
+        os.remove(image_path)
+    try:
+        module.save_image(chart, image_path)
+    except Exception as e:
+        message = str(e).strip().splitlines()
+        return message[0] if message else type(e).__name__
+    return None
+
+
+def iframe_markup(module, outputs):
+    """Markup for one visualization: a single iframe listing every breakpoint's
+    variant for responsive_frames.js, plus a static fallback without JavaScript.
+    """
+    attributes = [f'data-breakpoints="{" ".join(BREAKPOINTS)}"']
+    for breakpoint, media in BREAKPOINTS.items():
+        html_path, _ = outputs[breakpoint]
+        frame_height = module.SIZES[breakpoint][2]
+        attributes.append(
+            f'data-media-{breakpoint}="{html.escape(media)}" data-src-{breakpoint}="{html_path}" '
+            f'data-height-{breakpoint}="{frame_height}"'
+        )
+    lines = [
+        f'<iframe class="viz-frame" {" ".join(attributes)} '
+        f'width="100%" loading="lazy" title="{module.ALT_TEXT}" frameborder="0" scrolling="no"></iframe>'
+    ]
+
+    lines.append('<noscript>')
+    images = {breakpoint: image for breakpoint, (_, image) in outputs.items() if image}
+    if images:
+        lines.append('    <picture>')
+        for breakpoint, media in BREAKPOINTS.items():
+            if breakpoint in images and breakpoint != 'lg':
+                lines.append(f'        <source media="{media}" srcset="{images[breakpoint]}">')
+        fallback = images.get('lg') or next(iter(images.values()))
+        lines.append(f'        <img class="viz-image" src="{fallback}" alt="{module.ALT_TEXT}">')
+        lines.append('    </picture>')
+    else:
+        # No static image could be rendered on the build machine
+        lines.append(f'    <p class="viz-fallback">{module.ALT_TEXT}. This chart needs JavaScript; no static image is available.</p>')
+    lines.append('</noscript>')
+
+    return lines
+
+
+def update_index(blocks, index_file=INDEX_FILE):
+    """Replace the contents of each visualization container in index.html."""
+    with open(index_file, encoding='utf-8') as f:
+        html = f.read()
+
+    for container_id, lines in blocks.items():
+        pattern = re.compile(
+            r'(?P<open>^(?P<indent>[ \t]*)<div id="' + re.escape(container_id) + r'"[^>]*>\n)'
+            r'.*?'
+            r'(?P<close>^(?P=indent)</div>)',
+            re.S | re.M
+        )
+        match = pattern.search(html)
+        if match is None:
+            raise ValueError(f'No <div id="{container_id}"> found in {index_file}')
+        inner = ''.join(match.group('indent') + '    ' + line + '\n' for line in lines)
+        html = html[:match.start()] + match.group('open') + inner + match.group('close') + html[match.end():]
+
+    with open(index_file, 'w', encoding='utf-8') as f:
+        f.write(html)
+
+
+def generate_all(max_workers=None):
+    """Render every breakpoint variant of every visualization and update index.html.
+
+    Returns a list of (label, image errors) in VISUALIZATIONS order.
+    """
+    os.makedirs(VARIANTS_DIR, exist_ok=True)
+
+    modules = {}
+    jobs = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for module_name, _, _ in VISUALIZATIONS:
+            module = importlib.import_module(module_name)
+            modules[module_name] = module
+
+            check_sizes(module)
+
+            # Load data and build the spec once; variants only differ in size
+            df = module.load_data()
+            chart = module.build_chart(df)
+
+            for breakpoint in BREAKPOINTS:
+                width, height, _ = module.SIZES[breakpoint]
+                html_path, image_path = variant_paths(module, breakpoint)
+                future = executor.submit(
+                    render_variant, module_name, module.resize_chart(chart, width, height),
+                    df, html_path, image_path
+                )
+                jobs[(module_name, breakpoint)] = (future, html_path, image_path)
+
+        # Collect in submission order; HTML failures propagate to the caller
+        results = {key: future.result() for key, (future, _, _) in jobs.items()}
+
+    manifest = {breakpoint: {'html': [], 'images': []} for breakpoint in BREAKPOINTS}
+    blocks = {}
+    report = []
+    for module_name, label, container_id in VISUALIZATIONS:
+        outputs = {}
+        errors = []
+        for breakpoint in BREAKPOINTS:
+            _, html_path, image_path = jobs[(module_name, breakpoint)]
+            error = results[(module_name, breakpoint)]
+            if error:
+                errors.append(f"{breakpoint}: {error}")
+                image_path = None
+            else:
+                # The static render shows the size the chart really draws at
+                module = modules[module_name]
+                width, _ = image_size(image_path)
+                drawn = width / module.IMAGE_SCALE + module.PAGE_EXTRA_WIDTH
+                if drawn > chart_width(breakpoint):
+                    raise ValueError(
+                        f"{image_path} draws {drawn:.0f}px wide but the frame fits {chart_width(breakpoint)}px"
+                    )
+            outputs[breakpoint] = (html_path, image_path)
+            manifest[breakpoint]['html'].append(html_path)
+            if image_path:
+                manifest[breakpoint]['images'].append(image_path)
+
+        blocks[container_id] = iframe_markup(modules[module_name], outputs)
+        report.append((label, errors))
+
+    with open(VARIANTS_MANIFEST, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    update_index(blocks)
+    return report
+
+
+if __name__ == '__main__':
+    for label, errors in generate_all():
+        print(f"{label}: {len(BREAKPOINTS)} sizes")
+        for error in errors:
+            print(f"   Static image skipped ({error})")
@@ -4,97 +4,180 @@ Creates an interactive bar chart showing pet ownership in U.S. households
 Bar length shows millions of households, color intensity shows percentages
 """
 
+import os
+
 import pandas as pd
 import altair as alt
 
-# Load data from CSV
-df = pd.read_csv('datasets/2024_pet_ownership_full.csv')
-
-# Clean up the species name for "Small mammals"
-df['Species'] = df['Species'].str.replace('Small mammals (gerbils, hamsters, etc.)', 'Small mammals', regex=False)
-
-# Parse the millions column - remove 'M' and convert to float
-df['Millions'] = df['Millions_US_Households_Owning'].str.rstrip('M').astype(float)
-
-# Sort by millions (descending)
-df = df.sort_values('Millions', ascending=False)
-
-# Create the bar chart
-# Bar length shows millions of households, color intensity shows percentages
-chart = alt.Chart(df).mark_bar(
-    size=50,
-    cornerRadiusTopLeft=3,
-    cornerRadiusTopRight=3
-).encode(
-    x=alt.X('Species:N', 
-            title='Pet Type',
-            axis=alt.Axis(
-                labelAngle=-45, 
-                labelAlign='right',
-                labelFontSize=12,
-                labelLimit=150,
-                titleFontSize=14,
-                titleFontWeight='bold',
-                labelPadding=5
-            )),
-    y=alt.Y('Millions:Q',
-            title='Millions of U.S. Households',
-            scale=alt.Scale(domain=[0, 65])),
-    color=alt.Color('Percent_US_Households_Owning:Q',
-                   title='Percentage (%)',
-                   scale=alt.Scale(
-                       domain=[0, 50],
-                       scheme='blues',
-                       reverse=False
-                   ),
-                   legend=alt.Legend(
+from household_microdata import MICRODATA_STORE, METADATA_FILE, aggregate_ownership
+
+# Output file for the default (desktop) size
+OUTPUT_FILE = 'viz1_pet_ownership.html'
+
+# Whole-chart width and height (title, axes and legend included) and embedding
+# iframe height per breakpoint. Widths fit the narrowest viewport of each
+# breakpoint; see chart_width in responsive_variants.py
+SIZES = {
+    'sm': (194, 440, 460),
+    'md': (354, 400, 420),
+    'lg': (632, 480, 500)
+}
+
+# Vega-Embed reserves this much room right of the chart for its actions menu
+PAGE_EXTRA_WIDTH = 38
+
+# Pixel density of the static PNG fallbacks
+IMAGE_SCALE = 2
+
+ALT_TEXT = 'Bar chart of U.S. households owning each type of pet in 2024'
+
+# Bar width as a fraction of each category's band, so bars never overlap
+BAR_BAND = 0.8
+
+# Below this chart width the legend moves under the chart and the title,
+# axis labels and bar labels are laid out for a phone
+NARROW_WIDTH = 400
+
+TITLE = 'Pet Ownership in U.S. Households (2024)'
+NARROW_TITLE = ['Pet Ownership in U.S.', 'Households (2024)']
+NARROW_Y_TITLE = 'Households (millions)'
+
+
+def load_data():
+    if os.path.exists(os.path.join(MICRODATA_STORE, METADATA_FILE)):
+        # Derive the figures from the converted household microdata
+        # (see household_microdata.py for the one-time conversion step)
+        df = aggregate_ownership(MICRODATA_STORE)
+    else:
+        # Fall back to the pre-aggregated CSV
+        df = pd.read_csv('datasets/2024_pet_ownership_full.csv')
+
+        # Parse the millions column - remove 'M' and convert to float
+        df['Millions'] = df['Millions_US_Households_Owning'].str.rstrip('M').astype(float)
+
+    # Clean up the species name for "Small mammals"
+    df['Species'] = df['Species'].str.replace('Small mammals (gerbils, hamsters, etc.)', 'Small mammals', regex=False)
+
+    # Sort by millions (descending)
+    return df.sort_values('Millions', ascending=False)
+
+
+def build_chart(df):
+    """Build the chart spec without a size; see resize_chart."""
+    # Create the bar chart
+    # Bar length shows millions of households, color intensity shows percentages
+    chart = alt.Chart(df).mark_bar(
+        width=alt.RelativeBandSize(BAR_BAND),
+        cornerRadiusTopLeft=3,
+        cornerRadiusTopRight=3
+    ).encode(
+        x=alt.X('Species:N', 
+                title='Pet Type',
+                axis=alt.Axis(
+                    labelAngle=-45, 
+                    labelAlign='right',
+                    labelFontSize=12,
+                    labelLimit=150,
+                    titleFontSize=14,
+                    titleFontWeight='bold',
+                    labelPadding=5
+                )),
+        y=alt.Y('Millions:Q',
+                title='Millions of U.S. Households',
+                scale=alt.Scale(domain=[0, 65])),
+        color=alt.Color('Percent_US_Households_Owning:Q',
                        title='Percentage (%)',
-                       format='.1f',
-                       titleFontSize=12,
-                       labelFontSize=11
-                   )),
-    tooltip=[
-        alt.Tooltip('Species:N', title='Pet Type'),
-        alt.Tooltip('Millions:Q', title='Millions of Households', format='.1f'),
-        alt.Tooltip('Percent_US_Households_Owning:Q', title='Percentage', format='.1f')
-    ]
-).properties(
-    width=600,
-    height=390,
-    title='Pet Ownership in U.S. Households (2024)'
-)
-
-# Add text labels on bars showing millions
-text = alt.Chart(df).mark_text(
-    align='center',
-    baseline='bottom',
-    dy=-5,
-    fontSize=12,
-    fontWeight='bold',
-    color='#2c3e50'
-).encode(
-    x=alt.X('Species:N'),
-    y=alt.Y('Millions:Q'),
-    text=alt.Text('Millions:Q', format='.1f')
-)
-
-# Combine chart and text
-final_chart = (chart + text).resolve_scale(color='independent').configure_axis(
-    labelFontSize=12,
-    titleFontSize=14,
-    titleFontWeight='bold'
-).configure_title(
-    fontSize=16,
-    fontWeight='bold',
-    anchor='start'
-).configure_view(
-    strokeWidth=0,
-    continuousHeight=500,
-    continuousWidth=650
-)
-
-# Save as HTML
-final_chart.save('viz1_pet_ownership.html')
-
-print("Visualization 1 saved to viz1_pet_ownership.html")
+                       scale=alt.Scale(
+                           domain=[0, 50],
+                           scheme='blues',
+                           reverse=False
+                       ),
+                       legend=alt.Legend(
+                           title='Percentage (%)',
+                           format='.1f',
+                           titleFontSize=12,
+                           labelFontSize=11
+                       )),
+        tooltip=[
+            alt.Tooltip('Species:N', title='Pet Type'),
+            alt.Tooltip('Millions:Q', title='Millions of Households', format='.1f'),
+            alt.Tooltip('Percent_US_Households_Owning:Q', title='Percentage', format='.1f')
+        ]
+    ).properties(
+        title=TITLE
+    )
+
+    # Add text labels on bars showing millions
+    text = alt.Chart(df).mark_text(
+        align='center',
+        baseline='bottom',
+        dy=-5,
+        fontSize=12,
+        fontWeight='bold',
+        color='#2c3e50'
+    ).encode(
+        x=alt.X('Species:N'),
+        y=alt.Y('Millions:Q'),
+        text=alt.Text('Millions:Q', format='.1f')
+    )
+
+    # Combine chart and text
+    return (chart + text).resolve_scale(color='independent').configure_axis(
+        labelFontSize=12,
+        titleFontSize=14,
+        titleFontWeight='bold'
+    ).configure_title(
+        fontSize=16,
+        fontWeight='bold',
+        anchor='start'
+    ).configure_view(
+        strokeWidth=0,
+        continuousHeight=500,
+        continuousWidth=650
+    )
+
+
+def resize_chart(chart, width, height):
+    """Return a copy of the chart, title, axes and legend included, at the given size."""
+    sized = chart.copy(deep=True).properties(
+        width=width,
+        height=height,
+        autosize=alt.AutoSizeParams(type='fit', contains='padding')
+    )
+    if width < NARROW_WIDTH:
+        # A legend beside a phone-width chart leaves almost no room for the bars
+        sized.config.legend = alt.LegendConfig(orient='bottom', gradientLength=width - 60)
+        bars, text = sized.layer
+        # A layer's own title isn't counted when fitting, so the two-line one goes on top
+        bars.title = alt.Undefined
+        sized.title = NARROW_TITLE
+        bars.encoding.x['axis'].labelAngle = -90
+        # The full axis title is taller than a phone-height plot and would push the title out
+        bars.encoding.y['title'] = NARROW_Y_TITLE
+        # Upright bar labels are wider than the bars, so they run up from each bar
+        text.mark.angle = 270
+        text.mark.align = 'left'
+        text.mark.baseline = 'middle'
+        text.mark.dx = 4
+        text.mark.dy = 0
+        text.mark.fontSize = 10
+    return sized
+
+
+def render_html(chart, df):
+    return chart.to_html()
+
+
+def save_image(chart, path):
+    chart.save(path, scale_factor=IMAGE_SCALE)
+
+
+if __name__ == '__main__':
+    df = load_data()
+    width, height, _ = SIZES['lg']
+    final_chart = resize_chart(build_chart(df), width, height)
+
+    # Save as HTML
+    final_chart.save(OUTPUT_FILE)
 
+    print("Visualization 1 saved to viz1_pet_ownership.html")
@@ -8,61 +8,46 @@ import plotly.graph_objects as go
 import plotly.express as px
 import json
 
-# Load data from CSV
-df = pd.read_csv('datasets/data-VJH4o.csv')
-
-# Clean up percentage columns - remove % sign and convert to float
-df['Breakup_Percent'] = df['Percentage of dog owners who broke up with a significant other who didn\'t like their dog'].str.rstrip('%').astype(float)
-df['Moved_Percent'] = df['Percentage of dog owners who moved from an apartment to a house so their dog would have a yard'].str.rstrip('%').astype(float)
-
-# Create the choropleth map
-fig = go.Figure(data=go.Choropleth(
-    locations=df['State Abbreviations'],  # State abbreviations
-    z=df['Score'],  # Data to be color-coded
-    locationmode='USA-states',  # Set to plot as US states
-    colorscale='YlOrRd',  # Yellow-Orange-Red color scale
-    text=df.apply(lambda row: f"{row['State']}<br>" +
-                  f"Devotion Score: {row['Score']:.2f}<br>" +
-                  f"Rank: #{row['Rank']}<br>" +
-                  f"Moved for dog: {row['Moved_Percent']:.1f}%<br>" +
-                  f"Broke up over dog: {row['Breakup_Percent']:.1f}%", axis=1),
-    hovertemplate='%{text}<extra></extra>',
-    colorbar=dict(
-        title=dict(text="Devotion<br>Score", font=dict(size=12, weight='bold')),
-        tickfont=dict(size=11),
-        thickness=15,
-        len=0.5,
-        x=1.02,
-        xpad=5
-    ),
-    marker_line_color='white',
-    marker_line_width=1
-))
-
-# Update layout
-fig.update_layout(
-    title={
-        'text': 'Dog Owner Devotion by State',
-        'x': 0.5,
-        'xanchor': 'center',
-        'font': {'size': 16, 'color': '#2c3e50', 'weight': 'bold'}
-    },
-    geo=dict(
-        scope='usa',
-        projection=go.layout.geo.Projection(type='albers usa'),
-        showlakes=True,
-        lakecolor='rgb(255, 255, 255)',
-        bgcolor='rgba(0,0,0,0)'
-    ),
-    width=800,
-    height=600,
-    margin=dict(l=0, r=0, t=50, b=0),
-    plot_bgcolor='white',
-    paper_bgcolor='white'
-)
+from comparison_index import build_comparison_index
+
+# Output file for the default (desktop) size
+OUTPUT_FILE = 'viz2_regional_map.html'
+
+# Whole-chart width and height (title, axes and legend included) and embedding
+# iframe height per breakpoint. Widths fit the narrowest viewport of each
+# breakpoint; see chart_width in responsive_variants.py
+SIZES = {
+    'sm': (232, 200, 220),
+    'md': (392, 300, 320),
+    'lg': (670, 470, 490)
+}
+
+# Plotly draws everything (colorbar included) inside the figure size
+PAGE_EXTRA_WIDTH = 0
+
+# Pixel density of the static PNG fallbacks
+IMAGE_SCALE = 2
+
+ALT_TEXT = 'Choropleth map of dog owner devotion scores by U.S. state'
+
+# U.S. Census Bureau regions, used for regional percentiles in the comparison panel
+CENSUS_REGIONS = {
+    'Northeast': ['CT', 'ME', 'MA', 'NH', 'RI', 'VT', 'NJ', 'NY', 'PA'],
+    'Midwest': ['IL', 'IN', 'MI', 'OH', 'WI', 'IA', 'KS', 'MN', 'MO', 'NE', 'ND', 'SD'],
+    'South': ['DE', 'FL', 'GA', 'MD', 'NC', 'SC', 'VA', 'DC', 'WV', 'AL', 'KY', 'MS', 'TN',
+              'AR', 'LA', 'OK', 'TX'],
+    'West': ['AZ', 'CO', 'ID', 'MT', 'NV', 'NM', 'UT', 'WY', 'AK', 'CA', 'HI', 'OR', 'WA']
+}
+
+# Metrics in the comparison panel: column, label, decimals, suffix
+COMPARISON_METRICS = [
+    ('Score', 'Devotion Score', 2, ''),
+    ('Moved_Percent', 'Moved for dog', 1, '%'),
+    ('Breakup_Percent', 'Broke up over dog', 1, '%')
+]
 
 # Configure the modebar to match Visualization 1's interactive style
-config = {
+CONFIG = {
     'modeBarButtonsToAdd': ['downloadImage'],
     'displayModeBar': True,
     'displaylogo': False,
@@ -76,18 +61,8 @@ config = {
     }
 }
 
-# Get HTML string
-html_string = fig.to_html(include_plotlyjs='cdn', config=config)
-
-# Prepare state data for JavaScript
-state_data = df.to_dict('records')
-for record in state_data:
-    record['Score'] = float(record['Score'])
-    record['Breakup_Percent'] = float(record['Breakup_Percent'])
-    record['Moved_Percent'] = float(record['Moved_Percent'])
-
-# Add comparison panel CSS and JavaScript
-comparison_panel_html = """
+# Comparison panel CSS and JavaScript (COMPARISON_INDEX_JSON is filled in by render_html)
+COMPARISON_PANEL_HTML = """
 <style>
 .comparison-panel {
     position: absolute;
@@ -99,7 +74,7 @@ comparison_panel_html = """
     padding: 15px;
     box-shadow: 0 4px 12px rgba(0,0,0,0.15);
     min-width: 280px;
-    max-width: 320px;
+    max-width: min(560px, calc(100vw - 40px));
     z-index: 1000;
     font-family: Arial, sans-serif;
     font-size: 12px;
@@ -123,66 +98,62 @@ comparison_panel_html = """
     color: #7f8c8d;
     font-size: 11px;
     font-style: italic;
-    margin-bottom: 15px;
+    margin-bottom: 10px;
     padding: 8px;
     background: #f8f9fa;
     border-radius: 4px;
 }
 
-.state-comparison {
-    display: grid;
-    grid-template-columns: 1fr 1fr;
-    gap: 15px;
-    margin-bottom: 15px;
+.region-select {
+    width: 100%;
+    margin-bottom: 10px;
+    font-size: 11px;
+    padding: 4px;
 }
 
-.state-box {
-    border: 2px solid #ecf0f1;
-    border-radius: 6px;
-    padding: 10px;
-    background: #f8f9fa;
+.comparison-table-wrap {
+    overflow-x: auto;
 }
 
-.state-box.selected {
-    border-color: #3498db;
-    background: #ebf5fb;
+.comparison-table {
+    border-collapse: collapse;
+    width: 100%;
+    font-size: 11px;
 }
 
-.state-name {
-    font-weight: bold;
-    font-size: 13px;
+.comparison-table th,
+.comparison-table td {
+    padding: 6px 8px;
+    text-align: right;
+    border-bottom: 1px solid #ecf0f1;
+    white-space: nowrap;
+}
+
+.comparison-table th {
     color: #2c3e50;
-    margin-bottom: 8px;
-    text-align: center;
+    font-size: 12px;
+    background: #ebf5fb;
 }
 
-.metric-row {
-    display: flex;
-    justify-content: space-between;
-    margin-bottom: 6px;
-    font-size: 11px;
+.comparison-table th.baseline,
+.comparison-table td.baseline {
+    background: #f8f9fa;
+    color: #7f8c8d;
 }
 
-.metric-label {
+.comparison-table .metric-label {
+    text-align: left;
     color: #7f8c8d;
+    background: none;
 }
 
 .metric-value {
     font-weight: bold;
-    color: #2c3e50;
 }
 
-.comparison-diff {
-    margin-top: 10px;
-    padding-top: 10px;
-    border-top: 1px solid #ecf0f1;
-    font-size: 11px;
-}
-
-.diff-row {
-    display: flex;
-    justify-content: space-between;
-    margin-bottom: 4px;
+.metric-detail {
+    color: #95a5a6;
+    font-size: 10px;
 }
 
 .diff-positive {
@@ -193,107 +164,142 @@ comparison_panel_html = """
     color: #e74c3c;
 }
 
-.close-btn {
-    position: absolute;
-    top: 10px;
-    right: 10px;
+.close-btn,
+.remove-btn {
     background: none;
     border: none;
-    font-size: 18px;
     color: #95a5a6;
     cursor: pointer;
     padding: 0;
+}
+
+.close-btn {
+    position: absolute;
+    top: 10px;
+    right: 10px;
+    font-size: 18px;
     width: 20px;
     height: 20px;
     line-height: 20px;
 }
 
-.close-btn:hover {
+.remove-btn {
+    font-size: 13px;
+    margin-left: 4px;
+}
+
+.close-btn:hover,
+.remove-btn:hover {
     color: #2c3e50;
 }
 
 .plotly-container {
     position: relative;
 }
+
+/* Phone and tablet variants: the panel would cover the whole map, so it flows
+   below it instead and the embedding page grows the iframe to fit (see
+   reportHeight) */
+@media (max-width: 768px) {
+    .comparison-panel {
+        position: static;
+        margin-top: 10px;
+        min-width: 0;
+        max-width: none;
+        box-shadow: none;
+    }
+}
+
+/* Phone variant: let cells wrap so a couple of columns fit without scrolling */
+@media (max-width: 480px) {
+    .comparison-panel {
+        padding: 10px;
+    }
+
+    .comparison-table th,
+    .comparison-table td {
+        padding: 4px;
+        white-space: normal;
+    }
+}
 </style>
 
 <div class="comparison-panel" id="comparison-panel">
     <button class="close-btn" onclick="closeComparison()">×</button>
     <h3>State Comparison</h3>
     <div class="comparison-instruction" id="comparison-instruction">
-        Click two states on the map to compare them
+        Click states on the map to compare them
     </div>
-    <div class="state-comparison" id="state-comparison" style="display: none;">
-        <div class="state-box" id="state1-box">
-            <div class="state-name" id="state1-name">-</div>
-            <div class="metric-row">
-                <span class="metric-label">Devotion Score:</span>
-                <span class="metric-value" id="state1-score">-</span>
-            </div>
-            <div class="metric-row">
-                <span class="metric-label">Rank:</span>
-                <span class="metric-value" id="state1-rank">-</span>
-            </div>
-            <div class="metric-row">
-                <span class="metric-label">Moved for dog:</span>
-                <span class="metric-value" id="state1-moved">-</span>
-            </div>
-            <div class="metric-row">
-                <span class="metric-label">Broke up over dog:</span>
-                <span class="metric-value" id="state1-breakup">-</span>
-            </div>
-        </div>
-        <div class="state-box" id="state2-box">
-            <div class="state-name" id="state2-name">-</div>
-            <div class="metric-row">
-                <span class="metric-label">Devotion Score:</span>
-                <span class="metric-value" id="state2-score">-</span>
-            </div>
-            <div class="metric-row">
-                <span class="metric-label">Rank:</span>
-                <span class="metric-value" id="state2-rank">-</span>
-            </div>
-            <div class="metric-row">
-                <span class="metric-label">Moved for dog:</span>
-                <span class="metric-value" id="state2-moved">-</span>
-            </div>
-            <div class="metric-row">
-                <span class="metric-label">Broke up over dog:</span>
-                <span class="metric-value" id="state2-breakup">-</span>
-            </div>
-        </div>
-        <div class="comparison-diff" id="comparison-diff" style="display: none;">
-            <div class="diff-row">
-                <span>Score Difference:</span>
-                <span id="diff-score">-</span>
-            </div>
-            <div class="diff-row">
-                <span>Moved % Difference:</span>
-                <span id="diff-moved">-</span>
-            </div>
-            <div class="diff-row">
-                <span>Breakup % Difference:</span>
-                <span id="diff-breakup">-</span>
-            </div>
-        </div>
+    <select class="region-select" id="region-select" onchange="addRegion(this)">
+        <option value="">Add a region…</option>
+    </select>
+    <div class="comparison-table-wrap">
+        <table class="comparison-table" id="comparison-table"></table>
     </div>
 </div>
 
 <script>
-var stateData = """ + json.dumps(state_data) + """;
+// Precomputed in Python (comparison_index.py): every lookup below is by
+// position, so comparing any number of states never scans the data
+var comparisonIndex = COMPARISON_INDEX_JSON;
 
-var selectedStates = [];
+var MEDIAN = comparisonIndex.stats.indexOf('median');
+var P25 = comparisonIndex.stats.indexOf('p25');
+var P75 = comparisonIndex.stats.indexOf('p75');
+
+// State abbreviation -> position in the index
+var stateIndex = {};
+comparisonIndex.ids.forEach(function(id, i) { stateIndex[id] = i; });
+
+// Selected states and regions, in click order: {type: 'state' | 'region', index: n}
+var selectedItems = [];
 var originalColors = null;
 var originalLineWidths = null;
 
-function getStateByAbbr(abbr) {
-    return stateData.find(function(s) { return s['State Abbreviations'] === abbr; });
+function findItem(type, index) {
+    for (var k = 0; k < selectedItems.length; k++) {
+        if (selectedItems[k].type === type && selectedItems[k].index === index) return k;
+    }
+    return -1;
+}
+
+function toggleItem(type, index) {
+    var k = findItem(type, index);
+    if (k >= 0) {
+        selectedItems.splice(k, 1);
+    } else {
+        selectedItems.push({type: type, index: index});
+    }
+    updateComparisonPanel();
+}
+
+function removeItem(k) {
+    selectedItems.splice(k, 1);
+    updateComparisonPanel();
+}
+
+function addRegion(select) {
+    if (select.value !== '') {
+        var g = parseInt(select.value, 10);
+        if (findItem('region', g) < 0) toggleItem('region', g);
+    }
+    select.value = '';
 }
 
 function closeComparison() {
     document.getElementById('comparison-panel').classList.remove('active');
-    selectedStates = [];
+    selectedItems = [];
     resetMapHighlight();
+    reportHeight();
+}
+
+// Tell the embedding page (responsive_frames.js) how tall this chart now is,
+// so a panel below the map isn't clipped by the iframe
+function reportHeight() {
+    if (window.parent === window) return;
+    var body = document.body;
+    var height = Math.ceil(body.getBoundingClientRect().bottom) + parseInt(getComputedStyle(body).marginBottom, 10);
+    window.parent.postMessage({vizFrameHeight: height}, '*');
 }
 
 function resetMapHighlight() {
@@ -323,13 +329,16 @@ function highlightStates(stateAbbrs) {
         originalLineWidths = currentData.marker.line.width || 1;
     }
     
+    var highlighted = {};
+    stateAbbrs.forEach(function(abbr) { highlighted[abbr] = true; });
+    
     // Create new line colors and widths
     var newLineColors = locations.map(function(abbr) {
-        return stateAbbrs.indexOf(abbr) >= 0 ? '#3498db' : 'white';
+        return highlighted[abbr] ? '#3498db' : 'white';
     });
     
     var newLineWidths = locations.map(function(abbr) {
-        return stateAbbrs.indexOf(abbr) >= 0 ? 3 : 1;
+        return highlighted[abbr] ? 3 : 1;
     });
     
     Plotly.restyle(gd, {
@@ -338,93 +347,116 @@ function highlightStates(stateAbbrs) {
     }, [0]);
 }
 
+function formatValue(metric, value) {
+    return value.toFixed(metric.decimals) + metric.suffix;
+}
+
+function valueCell(metric, value, detail) {
+    // Colour against the national median, like the old pairwise differences
+    var median = metric.national[MEDIAN];
+    var cls = value > median ? 'diff-positive' : (value < median ? 'diff-negative' : '');
+    return '<td><div class="metric-value ' + cls + '">' + formatValue(metric, value) + '</div>' +
+           '<div class="metric-detail">' + detail + '</div></td>';
+}
+
+function itemName(item) {
+    return item.type === 'state' ? comparisonIndex.names[item.index] : comparisonIndex.groups[item.index];
+}
+
+function itemStates(item) {
+    if (item.type === 'state') return [comparisonIndex.ids[item.index]];
+    return comparisonIndex.members[item.index].map(function(i) { return comparisonIndex.ids[i]; });
+}
+
 function updateComparisonPanel() {
     var panel = document.getElementById('comparison-panel');
     var instruction = document.getElementById('comparison-instruction');
-    var comparison = document.getElementById('state-comparison');
-    var diff = document.getElementById('comparison-diff');
+    var table = document.getElementById('comparison-table');
     
-    if (selectedStates.length === 0) {
+    if (selectedItems.length === 0) {
         panel.classList.remove('active');
+        resetMapHighlight();
+        reportHeight();
         return;
     }
     
     panel.classList.add('active');
+    instruction.textContent = selectedItems.length === 1
+        ? 'Click more states, or add a region, to compare'
+        : 'Percentiles compare each state with all states (U.S.) and with its region';
     
-    if (selectedStates.length === 1) {
-        instruction.style.display = 'block';
-        instruction.textContent = 'Click another state to compare';
-        comparison.style.display = 'none';
-        diff.style.display = 'none';
-    } else if (selectedStates.length === 2) {
-        instruction.style.display = 'none';
-        comparison.style.display = 'grid';
-        diff.style.display = 'block';
-        
-        var state1 = getStateByAbbr(selectedStates[0]);
-        var state2 = getStateByAbbr(selectedStates[1]);
-        
-        // Update state 1
-        document.getElementById('state1-name').textContent = state1.State;
-        document.getElementById('state1-score').textContent = state1.Score.toFixed(2);
-        document.getElementById('state1-rank').textContent = '#' + state1.Rank;
-        document.getElementById('state1-moved').textContent = state1.Moved_Percent.toFixed(1) + '%';
-        document.getElementById('state1-breakup').textContent = state1.Breakup_Percent.toFixed(1) + '%';
-        document.getElementById('state1-box').classList.add('selected');
-        
-        // Update state 2
-        document.getElementById('state2-name').textContent = state2.State;
-        document.getElementById('state2-score').textContent = state2.Score.toFixed(2);
-        document.getElementById('state2-rank').textContent = '#' + state2.Rank;
-        document.getElementById('state2-moved').textContent = state2.Moved_Percent.toFixed(1) + '%';
-        document.getElementById('state2-breakup').textContent = state2.Breakup_Percent.toFixed(1) + '%';
-        document.getElementById('state2-box').classList.add('selected');
-        
-        // Calculate differences
-        var scoreDiff = state1.Score - state2.Score;
-        var movedDiff = state1.Moved_Percent - state2.Moved_Percent;
-        var breakupDiff = state1.Breakup_Percent - state2.Breakup_Percent;
-        
-        document.getElementById('diff-score').textContent = (scoreDiff >= 0 ? '+' : '') + scoreDiff.toFixed(2);
-        document.getElementById('diff-score').className = scoreDiff >= 0 ? 'diff-positive' : 'diff-negative';
-        
-        document.getElementById('diff-moved').textContent = (movedDiff >= 0 ? '+' : '') + movedDiff.toFixed(1) + '%';
-        document.getElementById('diff-moved').className = movedDiff >= 0 ? 'diff-positive' : 'diff-negative';
+    // Header: one column per selected state or region, then the U.S. baseline
+    var html = '<tr><th class="metric-label"></th>';
+    selectedItems.forEach(function(item, k) {
+        html += '<th>' + itemName(item) +
+                '<button class="remove-btn" onclick="removeItem(' + k + ')">×</button></th>';
+    });
+    html += '<th class="baseline">U.S. median</th></tr>';
+    
+    // Published rank for states, state count for regions
+    html += '<tr><td class="metric-label">Rank</td>';
+    selectedItems.forEach(function(item) {
+        html += item.type === 'state'
+            ? '<td class="metric-value">#' + comparisonIndex.rank[item.index] + '</td>'
+            : '<td class="metric-detail">' + comparisonIndex.members[item.index].length + ' states</td>';
+    });
+    html += '<td class="baseline">-</td></tr>';
+    
+    comparisonIndex.metricOrder.forEach(function(key) {
+        var metric = comparisonIndex.metrics[key];
+        html += '<tr><td class="metric-label">' + metric.label + '</td>';
         
-        document.getElementById('diff-breakup').textContent = (breakupDiff >= 0 ? '+' : '') + breakupDiff.toFixed(1) + '%';
-        document.getElementById('diff-breakup').className = breakupDiff >= 0 ? 'diff-positive' : 'diff-negative';
+        selectedItems.forEach(function(item) {
+            var i = item.index;
+            if (item.type === 'state') {
+                // Percentiles against all states and within the region, plus the region's median
+                var g = comparisonIndex.group[i];
+                html += valueCell(metric, metric.values[i],
+                    'p' + metric.pct[i] + ' U.S. · p' + metric.groupPct[i] + ' ' + comparisonIndex.groups[g] +
+                    '<br>' + comparisonIndex.groups[g] + ' median ' + formatValue(metric, metric.groupStats[g][MEDIAN]));
+            } else {
+                var stats = metric.groupStats[i];
+                var top = comparisonIndex.ids[metric.groupTop[i]];
+                html += valueCell(metric, stats[MEDIAN],
+                    'median · IQR ' + formatValue(metric, stats[P25]) + '–' + formatValue(metric, stats[P75]) +
+                    '<br>top ' + top);
+            }
+        });
         
-        // Highlight states on map
-        highlightStates(selectedStates);
-    }
+        html += '<td class="baseline"><div class="metric-value">' + formatValue(metric, metric.national[MEDIAN]) + '</div>' +
+                '<div class="metric-detail">IQR ' + formatValue(metric, metric.national[P25]) +
+                '–' + formatValue(metric, metric.national[P75]) + '</div></td></tr>';
+    });
+    
+    table.innerHTML = html;
+    
+    // Highlight selected states and every state in a selected region
+    var states = [];
+    selectedItems.forEach(function(item) { states = states.concat(itemStates(item)); });
+    highlightStates(states);
+    reportHeight();
 }
 
 // Wait for Plotly to initialize, then add click handler
 document.addEventListener('DOMContentLoaded', function() {
+    var select = document.getElementById('region-select');
+    comparisonIndex.groups.forEach(function(name, g) {
+        var option = document.createElement('option');
+        option.value = g;
+        option.textContent = name;
+        select.appendChild(option);
+    });
+    
     setTimeout(function() {
         var gd = document.querySelector('.plotly-graph-div');
         if (!gd) return;
         
         gd.on('plotly_click', function(data) {
             if (data.points && data.points.length > 0) {
-                var clickedState = data.points[0].location;
-                
-                // If clicking the same state, deselect it
-                var index = selectedStates.indexOf(clickedState);
-                if (index >= 0) {
-                    selectedStates.splice(index, 1);
-                } else {
-                    // Add state (max 2)
-                    if (selectedStates.length < 2) {
-                        selectedStates.push(clickedState);
-                    } else {
-                        // Replace first state with new one
-                        selectedStates[0] = selectedStates[1];
-                        selectedStates[1] = clickedState;
-                    }
-                }
+                var i = stateIndex[data.points[0].location];
                 
-                updateComparisonPanel();
+                // Clicking a selected state deselects it; any number can be compared
+                if (i !== undefined) toggleItem('state', i);
             }
         });
     }, 500);
@@ -432,22 +464,122 @@ document.addEventListener('DOMContentLoaded', function() {
 </script>
 """
 
-# Insert comparison panel before closing body tag
-html_string = html_string.replace('</body>', comparison_panel_html + '</body>')
-
-# Wrap plotly container
-html_string = html_string.replace(
-    '<div id="',
-    '<div class="plotly-container"><div id="'
-)
-html_string = html_string.replace(
-    '</div>\n</body>',
-    '</div></div>\n</body>'
-)
-
-# Write the modified HTML
-with open('viz2_regional_map.html', 'w', encoding='utf-8') as f:
-    f.write(html_string)
-
-print("Visualization 2 saved to viz2_regional_map.html with State Comparison Mode")
 
+def load_data():
+    """Load the state data; the comparison index is built here, once, in df.attrs."""
+    # Load data from CSV
+    df = pd.read_csv('datasets/data-VJH4o.csv')
+
+    # Clean up percentage columns - remove % sign and convert to float
+    df['Breakup_Percent'] = df['Percentage of dog owners who broke up with a significant other who didn\'t like their dog'].str.rstrip('%').astype(float)
+    df['Moved_Percent'] = df['Percentage of dog owners who moved from an apartment to a house so their dog would have a yard'].str.rstrip('%').astype(float)
+
+    # Assign each state its Census region
+    region_of = {abbr: region for region, abbrs in CENSUS_REGIONS.items() for abbr in abbrs}
+    df['Region'] = df['State Abbreviations'].map(region_of)
+
+    # Precompute percentiles, group leaders and regional quartiles for JavaScript.
+    # Every size variant ships the same index, so it is built once here rather
+    # than in render_html
+    comparison_index = build_comparison_index(df, 'State Abbreviations', 'State', 'Region', COMPARISON_METRICS)
+    comparison_index['rank'] = df['Rank'].tolist()
+    df.attrs['comparison_index'] = comparison_index
+
+    return df
+
+
+def build_chart(df):
+    """Build the figure without a size; see resize_chart."""
+    # Create the choropleth map
+    fig = go.Figure(data=go.Choropleth(
+        locations=df['State Abbreviations'],  # State abbreviations
+        z=df['Score'],  # Data to be color-coded
+        locationmode='USA-states',  # Set to plot as US states
+        colorscale='YlOrRd',  # Yellow-Orange-Red color scale
+        text=df.apply(lambda row: f"{row['State']}<br>" +
+                      f"Devotion Score: {row['Score']:.2f}<br>" +
+                      f"Rank: #{row['Rank']}<br>" +
+                      f"Moved for dog: {row['Moved_Percent']:.1f}%<br>" +
+                      f"Broke up over dog: {row['Breakup_Percent']:.1f}%", axis=1),
+        hovertemplate='%{text}<extra></extra>',
+        colorbar=dict(
+            title=dict(text="Devotion<br>Score", font=dict(size=12, weight='bold')),
+            tickfont=dict(size=11),
+            thickness=15,
+            len=0.5,
+            x=1.02,
+            xpad=5
+        ),
+        marker_line_color='white',
+        marker_line_width=1
+    ))
+
+    # Update layout
+    fig.update_layout(
+        title={
+            'text': 'Dog Owner Devotion by State',
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'size': 16, 'color': '#2c3e50', 'weight': 'bold'}
+        },
+        geo=dict(
+            scope='usa',
+            projection=go.layout.geo.Projection(type='albers usa'),
+            showlakes=True,
+            lakecolor='rgb(255, 255, 255)',
+            bgcolor='rgba(0,0,0,0)'
+        ),
+        margin=dict(l=0, r=0, t=50, b=0),
+        plot_bgcolor='white',
+        paper_bgcolor='white'
+    )
+
+    return fig
+
+
+def resize_chart(fig, width, height):
+    """Return a copy of the figure at the given size."""
+    return go.Figure(fig).update_layout(width=width, height=height)
+
+
+def render_html(fig, df):
+    """Render the figure with the State Comparison panel injected."""
+    # Get HTML string
+    html_string = fig.to_html(include_plotlyjs='cdn', config=CONFIG)
+
+    # Add comparison panel CSS and JavaScript, with the index from load_data
+    comparison_panel_html = COMPARISON_PANEL_HTML.replace(
+        'COMPARISON_INDEX_JSON',
+        json.dumps(df.attrs['comparison_index'], separators=(',', ':'))
+    )
+
+    # Insert comparison panel before closing body tag
+    html_string = html_string.replace('</body>', comparison_panel_html + '</body>')
+
+    # Wrap plotly container
+    html_string = html_string.replace(
+        '<div id="',
+        '<div class="plotly-container"><div id="'
+    )
+    html_string = html_string.replace(
+        '</div>\n</body>',
+        '</div></div>\n</body>'
+    )
+
+    return html_string
+
+
+def save_image(fig, path):
+    fig.write_image(path, scale=IMAGE_SCALE)
+
+
+if __name__ == '__main__':
+    df = load_data()
+    width, height, _ = SIZES['lg']
+    html_string = render_html(resize_chart(build_chart(df), width, height), df)
+
+    # Write the modified HTML
+    with open('viz2_regional_map.html', 'w', encoding='utf-8') as f:
+        f.write(html_string)
+
+    print("Visualization 2 saved to viz2_regional_map.html with State Comparison Mode")